@@ -4,6 +4,8 @@ Dagger pipeline for AI Factory Floor
 Provides containerized environments for AI agents to run in isolation
 """
 
+import asyncio
+import shlex
 import sys
 import os
 from typing import Optional
@@ -18,10 +20,81 @@ except ImportError:
     sys.exit(1)
 
 
+# Prebuilt image that already ships Python, pip, Node and npm
+_BASE_IMAGE = "nikolaik/python-nodejs:python3.12-nodejs20-slim"
+
+# Kept as a sorted tuple so the install argv (and thus Dagger's cache key)
+# is byte-identical across runs
+_APT_PACKAGES: tuple[str, ...] = (
+    "build-essential",
+    "curl",
+    "git",
+)
+assert list(_APT_PACKAGES) == sorted(_APT_PACKAGES), "_APT_PACKAGES must stay sorted"
+
+# Install prefix for the OpenCode CLI, built in its own stage
+_OPENCODE_PREFIX = "/opt/opencode"
+
+# npm manifests copied ahead of the source so the install layer only
+# depends on them
+_NPM_MANIFESTS = ("package.json", "package-lock.json", "npm-shrinkwrap.json")
+
+# Where run_agent_log collects agent output inside the container
+_AGENT_LOG = "/tmp/agent.log"
+
+
 @object_type
 class AIFactoryFloor:
     """Dagger module for AI Factory Floor workflows"""
 
+    async def _base_image(self) -> dagger.Container:
+        """
+        Build the toolchain base shared by every entrypoint
+
+        Contains only the package installs, with no source mounts or
+        per-call environment, so Dagger can reuse these layers across runs.
+        """
+        # Persist package downloads across runs, even when these layers miss
+        apt_cache = dag.cache_volume("apt-cache")
+        apt_lists = dag.cache_volume("apt-lists")
+        npm_cache = dag.cache_volume("npm-cache")
+
+        base = dag.container().from_(_BASE_IMAGE)
+
+        # The image already ships Node, so the OpenCode install does not
+        # depend on apt; build it as a sibling stage the engine can run in
+        # parallel with the apt install
+        npm_stage = (
+            base.with_mounted_cache("/root/.npm", npm_cache)
+            # Install OpenCode CLI
+            .with_exec(
+                ["npm", "install", "-g", "--prefix", _OPENCODE_PREFIX, "opencode-ai"]
+            )
+        )
+
+        return (
+            base
+            # Keep downloaded .debs so the apt cache volume is actually used
+            .with_exec(["rm", "-f", "/etc/apt/apt.conf.d/docker-clean"])
+            # apt takes its own lock files, so serialize concurrent builds
+            .with_mounted_cache(
+                "/var/cache/apt", apt_cache, sharing=dagger.CacheSharingMode.LOCKED
+            )
+            .with_mounted_cache(
+                "/var/lib/apt/lists", apt_lists, sharing=dagger.CacheSharingMode.LOCKED
+            )
+            # Install base dependencies
+            .with_exec(["apt-get", "update"])
+            .with_exec(["apt-get", "install", "-y", *_APT_PACKAGES])
+            # Mounts carry over to every later exec; drop the locked ones so
+            # agent and test runs don't serialize on them
+            .without_mount("/var/cache/apt")
+            .without_mount("/var/lib/apt/lists")
+            # Join the OpenCode install back in
+            .with_directory(_OPENCODE_PREFIX, npm_stage.directory(_OPENCODE_PREFIX))
+            .with_env_variable("PATH", f"{_OPENCODE_PREFIX}/bin:${{PATH}}", expand=True)
+        )
+
     @function
     async def dev_container(
         self,
@@ -35,31 +108,17 @@ class AIFactoryFloor:
             source: The worktree directory to mount
             context_dir: Optional context directory with issue information
         """
-        # Start with Ubuntu base
-        container = (
-            dag.container()
-            .from_("ubuntu:22.04")
-            # Install base dependencies
-            .with_exec(["apt-get", "update"])
-            .with_exec(
-                [
-                    "apt-get",
-                    "install",
-                    "-y",
-                    "git",
-                    "curl",
-                    "build-essential",
-                    "nodejs",
-                    "npm",
-                    "python3",
-                    "python3-pip",
-                ]
-            )
-            # Install OpenCode CLI
-            .with_exec(["npm", "install", "-g", "opencode-ai"])
-            # Mount the source code
-            .with_mounted_directory("/workspace", source)
-        )
+        return self._with_source(await self._base_image(), source, context_dir)
+
+    @staticmethod
+    def _with_source(
+        container: dagger.Container,
+        source: dagger.Directory,
+        context_dir: Optional[dagger.Directory] = None,
+    ) -> dagger.Container:
+        """Mount the worktree and context, and set the agent environment"""
+        # Mount the source code
+        container = container.with_mounted_directory("/workspace", source)
 
         # Mount context if provided
         if context_dir:
@@ -92,25 +151,94 @@ class AIFactoryFloor:
         # Create container
         container = await self.dev_container(source)
 
-        # Add API keys from environment
-        if os.getenv("ANTHROPIC_API_KEY"):
-            container = container.with_env_variable(
-                "ANTHROPIC_API_KEY", os.getenv("ANTHROPIC_API_KEY")
+        return await self._run_one(container, issue_number, model)
+
+    @function
+    async def run_agents(
+        self,
+        source: dagger.Directory,
+        issue_numbers: list[str],
+        model: str = "claude",
+    ) -> list[str]:
+        """
+        Run AI agents concurrently, one per issue, on a shared container
+
+        Args:
+            source: The worktree directory
+            issue_numbers: GitHub issue numbers to work on
+            model: AI model to use (claude, gemini, etc.)
+        """
+        container = await self.dev_container(source)
+
+        # Each run only adds its own exec, so the engine can schedule them in parallel
+        return list(
+            await asyncio.gather(
+                *(self._run_one(container, n, model) for n in issue_numbers)
             )
+        )
 
+    async def _run_one(
+        self,
+        container: dagger.Container,
+        issue_number: str,
+        model: str,
+    ) -> str:
+        """Run the agent for a single issue on top of a dev container"""
         # Run the AI agent in non-interactive mode
-        result = await container.with_exec(
-            [
-                "opencode",
-                "--non-interactive",
-                f"Read issue #{issue_number} and implement the solution. "
-                f"Follow the workflow in CLAUDE.md. "
-                f"Commit changes with conventional commits.",
-            ]
-        ).stdout()
+        result = await (
+            self._with_api_keys(container)
+            .with_exec(self._agent_args(issue_number))
+            .stdout()
+        )
 
         return result
 
+    @function
+    async def run_agent_log(
+        self,
+        source: dagger.Directory,
+        issue_number: str,
+        model: str = "claude",
+    ) -> dagger.File:
+        """
+        Run an AI agent on an issue and return its output as a log file
+
+        Output is teed to the engine's progress log while the agent runs,
+        so long runs give live feedback without buffering into one string.
+
+        Args:
+            source: The worktree directory
+            issue_number: GitHub issue number to work on
+            model: AI model to use (claude, gemini, etc.)
+        """
+        container = self._with_api_keys(await self.dev_container(source))
+        agent_cmd = shlex.join(self._agent_args(issue_number))
+
+        # Accept any exit status so a failed run still hands back its log
+        return container.with_exec(
+            ["bash", "-c", f"{agent_cmd} 2>&1 | tee {_AGENT_LOG}"],
+            expect=dagger.ReturnType.ANY,
+        ).file(_AGENT_LOG)
+
+    def _with_api_keys(self, container: dagger.Container) -> dagger.Container:
+        """Add API keys from the host environment"""
+        if os.getenv("ANTHROPIC_API_KEY"):
+            container = container.with_env_variable(
+                "ANTHROPIC_API_KEY", os.getenv("ANTHROPIC_API_KEY")
+            )
+        return container
+
+    @staticmethod
+    def _agent_args(issue_number: str) -> list[str]:
+        """Build the non-interactive opencode command for an issue"""
+        return [
+            "opencode",
+            "--non-interactive",
+            f"Read issue #{issue_number} and implement the solution. "
+            f"Follow the workflow in CLAUDE.md. "
+            f"Commit changes with conventional commits.",
+        ]
+
     @function
     async def test_container(
         self,
@@ -122,27 +250,47 @@ class AIFactoryFloor:
         Args:
             source: The worktree directory to test
         """
-        container = await self.dev_container(source)
-
-        # Detect test framework and run tests
-        container = container.with_exec(
-            [
-                "bash",
-                "-c",
-                """
-            if [ -f package.json ]; then
-                npm install && npm test
-            elif [ -f requirements.txt ]; then
-                pip3 install -r requirements.txt && python3 -m pytest
-            elif [ -f go.mod ]; then
-                go test ./...
-            else
-                echo "No test framework detected"
-            fi
-            """,
-            ]
+        # Persist dependency downloads across test runs
+        base = (
+            (await self._base_image())
+            .with_mounted_cache("/root/.cache/pip", dag.cache_volume("pip-cache"))
+            .with_mounted_cache("/root/.npm", dag.cache_volume("npm-cache"))
+            .with_mounted_cache("/root/go/pkg/mod", dag.cache_volume("go-mod-cache"))
         )
 
+        # Detect the test framework from the source listing. Dependencies
+        # are installed from the manifests alone, before the source is
+        # mounted, so a code-only change reuses the cached install.
+        entries = set(await source.entries())
+        if "package.json" in entries:
+            deps = base.with_workdir("/deps")
+            for name in _NPM_MANIFESTS:
+                if name in entries:
+                    deps = deps.with_file(f"/deps/{name}", source.file(name))
+            deps = deps.with_exec(["npm", "install"])
+            container = (
+                self._with_source(base, source)
+                .with_mounted_directory(
+                    "/workspace/node_modules", deps.directory("/deps/node_modules")
+                )
+                .with_exec(["npm", "test"])
+            )
+        elif "requirements.txt" in entries:
+            deps = base.with_file(
+                "/deps/requirements.txt", source.file("requirements.txt")
+            ).with_exec(["pip3", "install", "-r", "/deps/requirements.txt"])
+            container = self._with_source(deps, source).with_exec(
+                ["python3", "-m", "pytest"]
+            )
+        elif "go.mod" in entries:
+            container = self._with_source(base, source).with_exec(
+                ["go", "test", "./..."]
+            )
+        else:
+            container = self._with_source(base, source).with_exec(
+                ["echo", "No test framework detected"]
+            )
+
         return container
 
     @function
@@ -182,6 +330,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
@@ -7,29 +7,163 @@ A terminal UI for managing git worktrees, AI agents, and development workflows.
 import subprocess
 import json
 import os
+import shlex
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 import sys
 
-# Rich for terminal UI
+# Rich for terminal UI (Layout, Panel, Table and Tree are imported on first render)
 try:
     from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.layout import Layout
-    from rich.live import Live
-    from rich.text import Text
-    from rich.tree import Tree
-    from rich import print as rprint
-    from rich.prompt import Prompt, Confirm
+    from rich.prompt import Prompt
 except ImportError:
     print("Error: rich library not installed")
     print("Install with: pip install rich")
     sys.exit(1)
 
+if TYPE_CHECKING:
+    from rich.layout import Layout
+    from rich.table import Table
+    from rich.text import Text
+    from rich.tree import Tree
+
 console = Console()
 
+# Linux exposes live processes under /proc; elsewhere we fall back to os.kill
+HAS_PROC = os.path.isdir("/proc/self")
+
+# `git worktree list --porcelain` record keys -> worktree dict fields
+PORCELAIN_FIELDS = {
+    b'worktree': 'path',
+    b'HEAD': 'head',
+    b'branch': 'branch',
+}
+
+
+class DevenvSession:
+    """Runs commands inside one long-lived devenv shell"""
+    
+    SENTINEL = "__DEVFLOW_DONE__"
+    
+    def __init__(self):
+        # Entering devenv takes seconds, so outside of it we keep one shell
+        # open over a pipe and pay that cost once per TUI session
+        self.proc: Optional[subprocess.Popen] = None
+        # The environment doesn't change under us, so decide the route once
+        self.in_devenv = bool(os.environ.get('DEVENV_ROOT'))
+        
+    def wrap(self, cmd: List[str]) -> List[str]:
+        """Build an argv that runs an interactive `cmd` in devenv"""
+        if self.in_devenv:
+            return cmd
+        return ["devenv", "shell", "--impure", "-c", shlex.join(cmd)]
+        
+    def run(self, cmd: List[str], echo: bool = False) -> subprocess.CompletedProcess:
+        """Run a non-interactive command, capturing its combined output"""
+        # With echo, lines are printed as they arrive and stdout comes back empty
+        if self.in_devenv:
+            with subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            ) as proc:
+                output = self._collect(proc.stdout, echo)
+            return subprocess.CompletedProcess(cmd, proc.returncode, stdout=output, stderr="")
+            
+        warmup = ""
+        if self.proc is None or self.proc.poll() is not None:
+            try:
+                self.proc = subprocess.Popen(
+                    ["devenv", "shell", "--impure", "-c", "bash"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                )
+            except OSError as e:
+                self.proc = None
+                return subprocess.CompletedProcess(cmd, 127, stdout=str(e), stderr="")
+            # Whatever the shell prints on entry only matters if it then dies
+            returncode, warmup = self._exchange("true")
+            if returncode is None:
+                return self._shell_died(cmd, warmup)
+                
+        returncode, output = self._exchange(shlex.join(cmd), echo)
+        if returncode is None:
+            return self._shell_died(cmd, "\n".join(filter(None, (warmup, output))))
+        return subprocess.CompletedProcess(cmd, returncode, stdout=output, stderr="")
+        
+    def _exchange(self, command: str, echo: bool = False) -> Tuple[Optional[int], str]:
+        """Send one command line and read its output up to the sentinel"""
+        try:
+            self.proc.stdin.write(
+                f"{command} </dev/null 2>&1; printf '\\n{self.SENTINEL} %s\\n' $?\n"
+            )
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            # The shell is gone; still drain whatever it printed on the way out
+            pass
+            
+        status = []
+        
+        def until_sentinel():
+            for line in self.proc.stdout:
+                if line.startswith(self.SENTINEL):
+                    status.append(int(line.split()[1]))
+                    return
+                yield line
+                
+        output = self._collect(until_sentinel(), echo)
+        return (status[0] if status else None), output
+        
+    def _shell_died(self, cmd: List[str], output: str) -> subprocess.CompletedProcess:
+        """Reap a shell that exited mid-command and report it as the result"""
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.proc.wait()
+        self.proc.stdout.close()
+        self.proc = None
+        return subprocess.CompletedProcess(cmd, returncode, stdout=output, stderr="")
+        
+    @staticmethod
+    def _collect(lines, echo: bool) -> str:
+        """Buffer output lines, or print them as they arrive when echoing"""
+        if not echo:
+            return "".join(lines).rstrip("\n")
+        # Hold one line back so the newline printed ahead of the sentinel
+        # doesn't show up as a trailing blank line
+        pending = None
+        for line in lines:
+            if pending is not None:
+                console.print(pending.rstrip("\n"), style="dim", markup=False, highlight=False)
+            pending = line
+        if pending not in (None, "\n"):
+            console.print(pending.rstrip("\n"), style="dim", markup=False, highlight=False)
+        return ""
+        
+    def close(self):
+        """Shut down the shell, if one was started"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        self.proc = None
+
+
+devenv = DevenvSession()
+
 
 class WorktreeManager:
     """Manages git worktrees and their relationships"""
@@ -38,66 +172,157 @@ class WorktreeManager:
         self.root_dir = Path.cwd()
         self.worktree_base = self.root_dir / "worktrees"
         self.context_dir = ".context"
+        self._cache = None
+        self._cache_ts = 0.0
+        self._cache_fp = None
+        self._ttl = 2.0
+        
+    def invalidate(self):
+        """Drop cached worktree metadata so the next read hits git again"""
+        self._cache = None
+        
+    def _fingerprint(self, worktrees: List[Dict]) -> Optional[Tuple]:
+        """Collect mtimes that change whenever get_worktrees' result would"""
+        git_stamps = self._git_stamps()
+        if git_stamps is None:
+            return None
+        return git_stamps + self._worktree_stamps(worktrees)
+        
+    def _git_stamps(self) -> Optional[Tuple]:
+        """Stat the .git entries that move when the worktree list would"""
+        # HEAD and its reflog move on checkouts and commits; the worktrees
+        # dir on add/remove. From a linked worktree .git is a file, so there
+        # is nothing to stat and the TTL alone applies.
+        git_dir = self.root_dir / '.git'
+        paths = [git_dir / 'HEAD', git_dir / 'logs' / 'HEAD', git_dir / 'worktrees']
+        try:
+            with os.scandir(git_dir / 'worktrees') as it:
+                for entry in it:
+                    paths.append(Path(entry.path) / 'HEAD')
+                    paths.append(Path(entry.path) / 'logs' / 'HEAD')
+        except FileNotFoundError:
+            pass
+        except NotADirectoryError:
+            return None
+        return self._stat_mtimes(paths)
+        
+    def _worktree_stamps(self, worktrees: List[Dict]) -> Tuple:
+        """Stat each worktree and its context dir"""
+        paths = []
+        for wt in worktrees:
+            paths.append(wt['_path'])
+            paths.append(wt['_path'] / self.context_dir)
+        return self._stat_mtimes(paths)
+        
+    @staticmethod
+    def _stat_mtimes(paths: List[Path]) -> Tuple:
+        """mtime_ns of each path, or None where it can't be stat'ed"""
+        stamps = []
+        for path in paths:
+            try:
+                stamps.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
         
     def get_worktrees(self) -> List[Dict]:
         """Get all worktrees with their metadata"""
-        try:
-            result = subprocess.run(
-                ["git", "worktree", "list", "--porcelain"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+        now = time.monotonic()
+        if self._cache is not None:
+            if now - self._cache_ts < self._ttl:
+                return self._cache
+            # Past the TTL, a handful of stats can still vouch for the cache
+            fp = self._fingerprint(self._cache)
+            if fp is not None and fp == self._cache_fp:
+                self._cache_ts = now
+                return self._cache
             
+        # Stamp before reading, so a change landing mid-read leaves the
+        # fingerprint stale rather than vouching for outdated data
+        git_stamps = self._git_stamps()
+        
+        try:
             worktrees = []
             current_wt = {}
             
-            for line in result.stdout.strip().split('\n'):
-                if line.startswith('worktree '):
-                    if current_wt:
-                        worktrees.append(current_wt)
-                    current_wt = {'path': line.split(' ', 1)[1]}
-                elif line.startswith('HEAD '):
-                    current_wt['head'] = line.split(' ', 1)[1]
-                elif line.startswith('branch '):
-                    current_wt['branch'] = line.split(' ', 1)[1].replace('refs/heads/', '')
-                elif line.startswith('detached'):
-                    current_wt['detached'] = True
-                elif line == '':
-                    if current_wt:
-                        worktrees.append(current_wt)
-                        current_wt = {}
-            
+            # Parse raw bytes as git writes them; only the values we keep get decoded
+            with subprocess.Popen(
+                ["git", "worktree", "list", "--porcelain"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            ) as proc:
+                for line in proc.stdout:
+                    key, _, value = line.rstrip(b'\n').partition(b' ')
+                    field = PORCELAIN_FIELDS.get(key)
+                    if field == 'path':
+                        if current_wt:
+                            worktrees.append(current_wt)
+                        current_wt = {'path': os.fsdecode(value)}
+                    elif field == 'branch':
+                        current_wt['branch'] = os.fsdecode(value.removeprefix(b'refs/heads/'))
+                    elif field:
+                        current_wt[field] = os.fsdecode(value)
+                    elif key == b'detached':
+                        current_wt['detached'] = True
+                        
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args)
+                
+            # Records are closed by the next 'worktree' line, so blank
+            # separators need no handling of their own
             if current_wt:
                 worktrees.append(current_wt)
                 
+            for wt in worktrees:
+                wt['_path'] = Path(wt['path'])
+            wt_stamps = self._worktree_stamps(worktrees)
+            
             # Add additional metadata
+            cwd = Path.cwd()
+            by_parent: Dict[Path, List[Dict]] = {}
+            has_subdir = set()
             for wt in worktrees:
-                path = Path(wt['path'])
+                path = wt['_path']
                 wt['name'] = path.name if path != self.root_dir else 'main'
-                wt['is_current'] = path == Path.cwd()
+                wt['is_current'] = path == cwd
                 
-                # Check for context
-                context_path = path / self.context_dir
-                if context_path.exists():
-                    wt['has_context'] = True
-                    # Try to find issue number
-                    for f in context_path.glob('issue-*.md'):
-                        wt['issue'] = f.stem.replace('issue-', '')
-                        break
-                else:
-                    wt['has_context'] = False
+                # One listing of the worktree tells us about both .context/ and worktrees/
+                wt['has_context'] = False
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            if entry.name == self.context_dir:
+                                wt['has_context'] = entry.is_dir()
+                            elif entry.name == 'worktrees' and entry.is_dir():
+                                has_subdir.add(path)
+                except OSError:
+                    pass
                     
-                # Check for nested worktrees
+                # Try to find issue number
+                if wt['has_context']:
+                    try:
+                        with os.scandir(path / self.context_dir) as it:
+                            for entry in it:
+                                name = entry.name
+                                if name.startswith('issue-') and name.endswith('.md'):
+                                    wt['issue'] = name[6:-3]
+                                    break
+                    except OSError:
+                        pass
+                    
+                by_parent.setdefault(path.parent.parent, []).append(wt)
+                
+            # Check for nested worktrees
+            for wt in worktrees:
+                path = wt['_path']
+                children = by_parent.get(path)
                 wt['children'] = []
-                if path != self.root_dir:
-                    worktree_subdir = path / 'worktrees'
-                    if worktree_subdir.exists():
-                        for child in worktrees:
-                            child_path = Path(child['path'])
-                            if child_path.parent.parent == path:
-                                wt['children'].append(child['name'])
-                                
+                if children and path != self.root_dir and path in has_subdir:
+                    wt['children'] = [child['name'] for child in children]
+                    
+            self._cache = worktrees
+            self._cache_ts = now
+            self._cache_fp = None if git_stamps is None else git_stamps + wt_stamps
             return worktrees
             
         except subprocess.CalledProcessError as e:
@@ -107,24 +332,17 @@ class WorktreeManager:
     def create_worktree(self, branch_name: str, parent_branch: Optional[str] = None) -> bool:
         """Create a new worktree"""
         try:
-            # Check if we're already in devenv shell
-            if os.environ.get('DEVENV_ROOT'):
-                # We're in devenv, call the script directly
-                cmd = ["wt-new", branch_name]
-                if parent_branch:
-                    cmd.append(parent_branch)
-            else:
-                # Not in devenv, need to use devenv shell
-                cmd = ["devenv", "shell", "--impure", "-c", f"wt-new {branch_name}"]
-                if parent_branch:
-                    cmd[-1] += f" {parent_branch}"
+            cmd = ["wt-new", branch_name]
+            if parent_branch:
+                cmd.append(parent_branch)
                 
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = devenv.run(cmd)
             if result.returncode == 0:
+                self.invalidate()
                 console.print(f"[green]✅ Created worktree: {branch_name}[/green]")
                 return True
             else:
-                console.print(f"[red]Failed to create worktree: {result.stderr}[/red]")
+                console.print(f"[red]Failed to create worktree: {result.stderr or result.stdout}[/red]")
                 return False
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
@@ -143,43 +361,120 @@ class MCPServerManager:
             "sequential": "Sequential Thinking",
             "zen": "Zen Multi-Model"
         }
+        self._cache = None
+        self._cache_ts = 0.0
+        self._ttl = 1.5
+        
+    def invalidate(self):
+        """Drop the cached status so the next read checks the pid files again"""
+        self._cache = None
         
     def get_status(self) -> Dict[str, str]:
         """Get status of all MCP servers"""
+        now = time.monotonic()
+        if self._cache is not None and now - self._cache_ts < self._ttl:
+            return self._cache
+            
+        self._cache = self._read_status()
+        self._cache_ts = now
+        return self._cache
+        
+    def _read_status(self) -> Dict[str, str]:
+        """Read server status from the pid files"""
         status = {}
         pid_dir = self.mcp_dir / "pids"
         
-        if not pid_dir.exists():
+        # List the pid files in one pass instead of probing each one
+        try:
+            with os.scandir(pid_dir) as it:
+                pid_files = {
+                    entry.name[:-4]: entry.path for entry in it if entry.name.endswith(".pid")
+                }
+        except (FileNotFoundError, NotADirectoryError):
             return {name: "not configured" for name in self.servers}
             
+        live_pids = self._live_pids()
         for server_name in self.servers:
-            pid_file = pid_dir / f"{server_name}.pid"
-            if pid_file.exists():
-                try:
-                    pid = int(pid_file.read_text().strip())
-                    # Check if process is running
-                    os.kill(pid, 0)
-                    status[server_name] = "running"
-                except (OSError, ValueError):
-                    status[server_name] = "stopped"
-            else:
+            pid_file = pid_files.get(server_name)
+            if pid_file is None:
                 status[server_name] = "not started"
+                continue
+            try:
+                with open(pid_file) as f:
+                    pid = int(f.read().strip())
+            except (OSError, ValueError):
+                status[server_name] = "stopped"
+                continue
+                
+            # Check if process is running
+            alive = str(pid) in live_pids if live_pids is not None else self._is_alive(pid)
+            status[server_name] = "running" if alive else "stopped"
                 
         return status
     
+    @staticmethod
+    def _live_pids() -> Optional[set]:
+        """Snapshot running PIDs as strings, or None without /proc"""
+        if not HAS_PROC:
+            return None
+        try:
+            # Non-numeric entries like 'self' can never match a str(pid)
+            return set(os.listdir('/proc'))
+        except OSError:
+            return None
+    
     def start_servers(self):
         """Start all MCP servers"""
-        if os.environ.get('DEVENV_ROOT'):
-            subprocess.run(["mcp-start"])
-        else:
-            subprocess.run(["devenv", "shell", "--impure", "-c", "mcp-start"])
-        
-    def stop_servers(self):
-        """Stop all MCP servers"""
-        if os.environ.get('DEVENV_ROOT'):
-            subprocess.run(["mcp-stop"])
-        else:
-            subprocess.run(["devenv", "shell", "--impure", "-c", "mcp-stop"])
+        result = devenv.run(["mcp-start"], echo=True)
+        if result.returncode != 0:
+            console.print(f"[red]Failed to start MCP servers: {result.stdout}[/red]")
+        self.invalidate()
+        
+    def stop_servers(self, grace: float = 2.0):
+        """Stop all MCP servers, killing any still alive after `grace` seconds"""
+        # Signal the recorded pids directly, like `mcp-stop`, without paying
+        # for a devenv shell evaluation
+        self.invalidate()
+        pid_dir = self.mcp_dir / "pids"
+        if not pid_dir.is_dir():
+            return
+            
+        stopping = []
+        for pid_file in pid_dir.glob("*.pid"):
+            try:
+                pid = int(pid_file.read_text().strip())
+                if pid <= 0:
+                    # 0 and negative pids would signal whole process groups
+                    raise ValueError(pid)
+                os.kill(pid, signal.SIGTERM)
+                console.print(f"    Stopping {pid_file.stem} (PID: {pid})")
+                stopping.append(pid)
+            except (OSError, ValueError):
+                pass
+            pid_file.unlink(missing_ok=True)
+            
+        deadline = time.monotonic() + grace
+        while stopping and time.monotonic() < deadline:
+            time.sleep(0.1)
+            stopping = [pid for pid in stopping if self._is_alive(pid)]
+            
+        for pid in stopping:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+                
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        """Check whether a process still exists"""
+        if HAS_PROC:
+            # A plain stat; no exception raised for dead pids
+            return os.path.isdir(f"/proc/{pid}")
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return False
+        return True
 
 
 class DevFlowTUI:
@@ -189,50 +484,84 @@ class DevFlowTUI:
         self.wt_manager = WorktreeManager()
         self.mcp_manager = MCPServerManager()
         self.running = True
+        self.layout: Optional["Layout"] = None
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        self._wt_state = None
+        self._mcp_state = None
+        
+        # Static panels, built once per session
+        from rich.panel import Panel
+        
+        self._header_panel = Panel(
+            "[bold blue]🏭 AI Factory Floor - DevFlow Manager[/bold blue]\n"
+            "[dim]Manage worktrees, AI agents, and development workflows[/dim]",
+            border_style="blue"
+        )
+        self._footer_panel = Panel(
+            "[bold]Commands:[/bold] "
+            "[cyan](n)[/cyan]ew worktree | "
+            "[cyan](a)[/cyan]gent start | "
+            "[cyan](s)[/cyan]tart MCP | "
+            "[cyan](k)[/cyan]ill MCP | "
+            "[cyan](r)[/cyan]efresh | "
+            "[cyan](R)[/cyan] force refresh | "
+            "[cyan](q)[/cyan]uit",
+            border_style="dim"
+        )
         
-    def create_worktree_tree(self) -> Tree:
+    def create_worktree_tree(self, worktrees: Optional[List[Dict]] = None) -> "Tree":
         """Create a tree visualization of worktrees"""
+        from rich.tree import Tree
+        
         tree = Tree("🌳 [bold]Worktrees[/bold]")
-        worktrees = self.wt_manager.get_worktrees()
+        if worktrees is None:
+            worktrees = self.wt_manager.get_worktrees()
         
         # Build tree structure
-        root_wts = [wt for wt in worktrees if Path(wt['path']).parent == self.wt_manager.root_dir.parent or Path(wt['path']) == self.wt_manager.root_dir]
+        by_name = {wt['name']: wt for wt in reversed(worktrees)}  # first match wins
+        root_dir = self.wt_manager.root_dir
+        root_wts = [wt for wt in worktrees if wt['_path'].parent == root_dir.parent or wt['_path'] == root_dir]
         
         for wt in root_wts:
-            branch_name = wt.get('branch', 'detached')
-            issue = f" #{wt['issue']}" if wt.get('issue') else ""
-            current = " [cyan][current][/cyan]" if wt['is_current'] else ""
-            
-            node_text = f"{branch_name}{issue}{current}"
-            node = tree.add(node_text)
+            node = tree.add(self._node_label(wt))
             
             # Add children recursively
-            self._add_children_to_tree(node, wt, worktrees)
+            self._add_children_to_tree(node, wt, by_name)
             
         return tree
     
-    def _add_children_to_tree(self, parent_node, parent_wt, all_worktrees):
+    @staticmethod
+    def _node_label(wt: Dict) -> "Text":
+        """Build a tree node label as styled Text, skipping markup parsing"""
+        from rich.text import Text
+        
+        label = Text(wt.get('branch', 'detached'))
+        if wt.get('issue'):
+            label.append(f" #{wt['issue']}")
+        if wt['is_current']:
+            label.append(" [current]", style="cyan")
+        return label
+    
+    def _add_children_to_tree(self, parent_node, parent_wt, by_name):
         """Recursively add children to tree"""
         for child_name in parent_wt.get('children', []):
-            child_wt = next((wt for wt in all_worktrees if wt['name'] == child_name), None)
+            child_wt = by_name.get(child_name)
             if child_wt:
-                branch_name = child_wt.get('branch', 'detached')
-                issue = f" #{child_wt['issue']}" if child_wt.get('issue') else ""
-                current = " [cyan][current][/cyan]" if child_wt['is_current'] else ""
-                
-                node_text = f"{branch_name}{issue}{current}"
-                child_node = parent_node.add(node_text)
+                child_node = parent_node.add(self._node_label(child_wt))
                 
                 # Recurse for nested children
-                self._add_children_to_tree(child_node, child_wt, all_worktrees)
+                self._add_children_to_tree(child_node, child_wt, by_name)
     
-    def create_mcp_status_table(self) -> Table:
+    def create_mcp_status_table(self, status: Optional[Dict[str, str]] = None) -> "Table":
         """Create a table showing MCP server status"""
+        from rich.table import Table
+        
         table = Table(title="🔌 MCP Server Status", show_header=True)
         table.add_column("Server", style="cyan")
         table.add_column("Status", style="green")
         
-        status = self.mcp_manager.get_status()
+        if status is None:
+            status = self.mcp_manager.get_status()
         for server_name, desc in self.mcp_manager.servers.items():
             server_status = status.get(server_name, "unknown")
             status_style = "green" if server_status == "running" else "red" if server_status == "stopped" else "yellow"
@@ -240,8 +569,10 @@ class DevFlowTUI:
             
         return table
     
-    def create_layout(self) -> Layout:
+    def create_layout(self) -> "Layout":
         """Create the main layout"""
+        from rich.layout import Layout
+        
         layout = Layout()
         
         # Split into header and body
@@ -252,13 +583,7 @@ class DevFlowTUI:
         )
         
         # Header
-        layout["header"].update(
-            Panel(
-                "[bold blue]🏭 AI Factory Floor - DevFlow Manager[/bold blue]\n"
-                "[dim]Manage worktrees, AI agents, and development workflows[/dim]",
-                border_style="blue"
-            )
-        )
+        layout["header"].update(self._header_panel)
         
         # Body - split into left and right
         layout["body"].split_row(
@@ -266,37 +591,48 @@ class DevFlowTUI:
             Layout(name="right")
         )
         
-        # Left panel - worktree tree
-        layout["body"]["left"].update(
-            Panel(self.create_worktree_tree(), border_style="green")
-        )
-        
-        # Right panel - MCP status
-        layout["body"]["right"].update(
-            Panel(self.create_mcp_status_table(), border_style="yellow")
-        )
+        # Left/right panels - worktree tree and MCP status
+        self._wt_state = None
+        self._mcp_state = None
+        self.update_layout(layout)
         
         # Footer - commands
-        layout["footer"].update(
-            Panel(
-                "[bold]Commands:[/bold] "
-                "[cyan](n)[/cyan]ew worktree | "
-                "[cyan](a)[/cyan]gent start | "
-                "[cyan](s)[/cyan]tart MCP | "
-                "[cyan](k)[/cyan]ill MCP | "
-                "[cyan](r)[/cyan]efresh | "
-                "[cyan](q)[/cyan]uit",
-                border_style="dim"
-            )
-        )
+        layout["footer"].update(self._footer_panel)
         
         return layout
     
+    def update_layout(self, layout: "Layout"):
+        """Rebuild only the body panels whose underlying state changed"""
+        from rich.panel import Panel
+        
+        # git and the pid files are independent I/O, so fetch them side by side
+        wt_future = self._pool.submit(self.wt_manager.get_worktrees)
+        mcp_future = self._pool.submit(self.mcp_manager.get_status)
+        worktrees = wt_future.result()
+        status = mcp_future.result()
+        
+        wt_state = tuple(
+            (wt['path'], wt.get('branch'), wt.get('issue'), wt['is_current'], tuple(wt['children']))
+            for wt in worktrees
+        )
+        if wt_state != self._wt_state:
+            layout["body"]["left"].update(
+                Panel(self.create_worktree_tree(worktrees), border_style="green")
+            )
+            self._wt_state = wt_state
+            
+        mcp_state = tuple(status.items())
+        if mcp_state != self._mcp_state:
+            layout["body"]["right"].update(
+                Panel(self.create_mcp_status_table(status), border_style="yellow")
+            )
+            self._mcp_state = mcp_state
+    
     def handle_input(self) -> bool:
         """Handle user input"""
         key = Prompt.ask(
             "\n[bold]Command[/bold]",
-            choices=["n", "a", "s", "k", "r", "q"],
+            choices=["n", "a", "s", "k", "r", "R", "q"],
             default="r"
         )
         
@@ -311,10 +647,7 @@ class DevFlowTUI:
             worktree = Prompt.ask("[bold]Worktree name (or 'here' for current)[/bold]")
             if worktree == "here":
                 # Start agent in current directory
-                if os.environ.get('DEVENV_ROOT'):
-                    subprocess.run(["agent-here"])
-                else:
-                    subprocess.run(["devenv", "shell", "--impure", "-c", "agent-here"])
+                subprocess.run(devenv.wrap(["agent-here"]))
             else:
                 # Start agent in specific worktree
                 worktree_path = Path("worktrees") / worktree
@@ -327,10 +660,9 @@ class DevFlowTUI:
                         subprocess.run(["zellij", "action", "write-chars", "agent-here\n"])
                     else:
                         # Not in zellij, run in current terminal
-                        if os.environ.get('DEVENV_ROOT'):
-                            subprocess.run(["sh", "-c", f"cd {worktree_path} && agent-here"])
-                        else:
-                            subprocess.run(["devenv", "shell", "--impure", "-c", f"cd {worktree_path} && agent-here"])
+                        subprocess.run(devenv.wrap(
+                            ["sh", "-c", f"cd {shlex.quote(str(worktree_path))} && agent-here"]
+                        ))
                 else:
                     console.print(f"[red]Worktree {worktree} not found[/red]")
         elif key == "s":
@@ -340,7 +672,12 @@ class DevFlowTUI:
             console.print("[yellow]Stopping MCP servers...[/yellow]")
             self.mcp_manager.stop_servers()
         elif key == "r":
+            # The caches' TTL and fingerprint checks decide whether to re-read
             console.print("[dim]Refreshing...[/dim]")
+        elif key == "R":
+            console.print("[dim]Forcing refresh...[/dim]")
+            self.wt_manager.invalidate()
+            self.mcp_manager.invalidate()
             
         return True
     
@@ -348,14 +685,21 @@ class DevFlowTUI:
         """Run the TUI"""
         console.clear()
         
-        while self.running:
-            layout = self.create_layout()
-            console.print(layout)
-            
-            if not self.handle_input():
-                self.running = False
+        # Build the layout once; each pass only swaps in panels that changed.
+        # The blocking prompt below needs the terminal, so we repaint between
+        # commands rather than holding a rich Live display open.
+        try:
+            self.layout = self.create_layout()
+            while self.running:
+                self.update_layout(self.layout)
+                console.print(self.layout)
                 
-            console.clear()
+                if not self.handle_input():
+                    self.running = False
+                    
+                console.clear()
+        finally:
+            self._pool.shutdown(wait=False)
         
         console.print("[green]Goodbye! 👋[/green]")
 
@@ -371,6 +715,8 @@ def main():
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
         raise
+    finally:
+        devenv.close()
 
 
 if __name__ == "__main__":
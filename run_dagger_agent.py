@@ -11,6 +11,16 @@ import dagger
 import argparse
 
 
+# Update and install in one exec so Dagger snapshots a single layer; package
+# lists and downloads live on cache volumes, so there is nothing to clean up
+APT_INSTALL = (
+    "rm -f /etc/apt/apt.conf.d/docker-clean"
+    " && apt-get update"
+    " && apt-get install -y --no-install-recommends"
+    " ca-certificates git curl build-essential nodejs npm python3 python3-pip"
+)
+
+
 async def run_agent_in_container(
     source_dir: str,
     context_dir: str = None,
@@ -32,15 +42,25 @@ async def run_agent_in_container(
         # Get the source directory
         source = client.host().directory(source_dir, exclude=[".git", "node_modules", ".venv", "__pycache__"])
         
+        # Persist package downloads across runs
+        apt_cache = client.cache_volume("agent-apt-cache")
+        apt_lists = client.cache_volume("agent-apt-lists")
+        pip_cache = client.cache_volume("pip-cache")
+        
         # Start with Ubuntu base
         container = (
             client.container()
             .from_("ubuntu:22.04")
-            # Install base dependencies
-            .with_exec(["apt-get", "update"])
-            .with_exec(["apt-get", "install", "-y", 
-                       "git", "curl", "build-essential", 
-                       "nodejs", "npm", "python3", "python3-pip"])
+            .with_env_variable("DEBIAN_FRONTEND", "noninteractive")
+            # apt takes its own lock files, so serialize concurrent runs
+            .with_mounted_cache("/var/cache/apt", apt_cache, sharing=dagger.CacheSharingMode.LOCKED)
+            .with_mounted_cache("/var/lib/apt/lists", apt_lists, sharing=dagger.CacheSharingMode.LOCKED)
+            .with_mounted_cache("/root/.cache/pip", pip_cache)
+            # Install base dependencies in a single layer
+            .with_exec(["bash", "-c", APT_INSTALL])
+            # Release the locked apt caches so only the install holds them
+            .without_mount("/var/cache/apt")
+            .without_mount("/var/lib/apt/lists")
         )
         
         # Install Claude CLI (if available in npm)
@@ -88,21 +108,29 @@ async def run_agent_in_container(
             else:
                 cmd = ["bash", "-c", f"echo 'Task: {task_msg}' && echo 'Note: ANTHROPIC_API_KEY not set'"]
         
+        # Fingerprint the workspace before the agent touches it
+        workspace_before = await container.directory("/workspace").digest()
+        
         # Execute the command
         if interactive:
             print("🐳 Starting interactive container...")
             print("Note: This would normally start an interactive session.")
             print("To work with the agent, you would connect to this container.")
-            result = await container.with_exec(["echo", "Container ready"]).stdout()
+            container = container.with_exec(["echo", "Container ready"])
         else:
             print("🐳 Running agent in container...")
-            result = await container.with_exec(cmd).stdout()
+            container = container.with_exec(cmd)
+        result = await container.stdout()
         
         print(result)
         
         # Export the working directory back to host if changes were made
         # This would sync changes back to the worktree
-        await container.directory("/workspace").export(source_dir)
+        workspace = container.directory("/workspace")
+        if await workspace.digest() != workspace_before:
+            await workspace.export(source_dir)
+        else:
+            print("No filesystem changes to export")
         
         return result
 